@@ -1,7 +1,12 @@
 import sys
 
 from serialpy.serial import ModemBits, Serial, STOPBITS_ONE, PARITY_NONE
-from serialpy.async_serial import SerialTransport, create_serial_connection, open_serial_connection
+from serialpy.async_serial import (
+    SerialTransport,
+    serial_connection,
+    create_serial_connection,
+    open_serial_connection,
+)
 
 _MODULES_TO_PATCH = ["serial", "serial_asyncio", "serial_asyncio_fast"]
 
@@ -1,7 +1,9 @@
 from __future__ import annotations
 
+import typing
 import asyncio
 import logging
+import contextlib
 import urllib.parse
 
 from serialpy.serial import ModemBits, Serial, STOPBITS_ONE, PARITY_NONE
@@ -25,6 +27,8 @@ class SerialTransport(DescriptorTransport):
         rtscts=False,
         waiter=None,
         extra=None,
+        *,
+        latency_timer_us=None,
     ):
         super().__init__(loop, protocol, path, waiter, extra)
         self._serial = Serial(
@@ -33,12 +37,15 @@ class SerialTransport(DescriptorTransport):
             stopbits=stopbits,
             xonxoff=xonxoff,
             rtscts=rtscts,
-            # `DescriptorTransport` opened the port
+            # `DescriptorTransport` opened the port, `Serial` configures it
             fileno=self._fileno,
+            latency_timer_us=latency_timer_us,
         )
-        self._serial.configure_port()
         self._extra["serial"] = self._serial
 
+        # Read at most ~100ms worth of data per event loop iteration (10 bits per byte)
+        self.max_size = max(4096, baudrate // 10 // 10)
+
     @property
     def serial(self):
         return self._serial
@@ -54,6 +61,7 @@ async def create_serial_connection(
     xonxoff=False,
     rtscts=False,
     *,
+    latency_timer_us=None,
     transport_factory=SerialTransport,
 ) -> tuple[SerialTransport, asyncio.Protocol]:
     parsed_path = urllib.parse.urlparse(url)
@@ -63,6 +71,12 @@ async def create_serial_connection(
             lambda: protocol, parsed_path.hostname, parsed_path.port
         )
     else:
+        # Only pass new options when they are used, custom factories may predate them
+        extra_kwargs = {}
+
+        if latency_timer_us is not None:
+            extra_kwargs["latency_timer_us"] = latency_timer_us
+
         protocol = protocol_factory()
         transport = transport_factory(
             loop=loop,
@@ -72,6 +86,7 @@ async def create_serial_connection(
             stopbits=stopbits,
             xonxoff=xonxoff,
             rtscts=rtscts,
+            **extra_kwargs,
         )
 
     return transport, protocol
@@ -86,3 +101,27 @@ async def open_serial_connection(*args, **kwargs) -> tuple[asyncio.StreamReader,
     writer = asyncio.StreamWriter(transport, protocol, reader, loop)
 
     return reader, writer
+
+
+@contextlib.asynccontextmanager
+async def serial_connection(
+    *args, close_timeout: float | None = None, **kwargs
+) -> typing.AsyncIterator[tuple[asyncio.StreamReader, asyncio.StreamWriter]]:
+    """
+    Opens a `(reader, writer)` pair with `open_serial_connection` and closes it on exit,
+    after all buffered data has been written. If `close_timeout` is set, a connection that
+    takes longer than that to close is aborted and any unwritten data is discarded.
+    """
+
+    reader, writer = await open_serial_connection(*args, **kwargs)
+
+    try:
+        yield reader, writer
+    finally:
+        writer.close()
+
+        try:
+            await asyncio.wait_for(writer.wait_closed(), close_timeout)
+        except asyncio.TimeoutError:
+            LOGGER.debug("Closing timed out, aborting %r", writer.transport)
+            writer.transport.abort()
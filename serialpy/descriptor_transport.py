@@ -6,10 +6,13 @@ import typing
 import asyncio
 import logging
 import warnings
+import itertools
+import collections
 
 
 LOGGER = logging.getLogger(__name__)
 LOG_THRESHOLD_FOR_CONNLOST_WRITES = 5
+IOV_MAX = os.sysconf("SC_IOV_MAX")  # max buffers accepted by a single `os.writev` call
 
 
 class DescriptorTransport(asyncio.transports.Transport):
@@ -21,7 +24,7 @@ class DescriptorTransport(asyncio.transports.Transport):
       3. `asyncio.unix_events._UnixReadPipeTransport`
     """
 
-    max_size = 256 * 1024  # max bytes we read in one event loop iteration
+    max_size = 64 * 1024  # max bytes we read in one event loop iteration
     transport_name = "file"
 
     def __init__(
@@ -41,8 +44,16 @@ class DescriptorTransport(asyncio.transports.Transport):
         self._protocol_paused = False
 
         self._protocol: asyncio.Protocol = protocol
-        self._buffer = bytearray()
+        self._data_received: typing.Callable[[bytes], None] | None = None
+        self.set_protocol(protocol)
+        self._buffer: collections.deque[memoryview] = collections.deque()
+        self._buffer_size = 0
+        self._flush_handle: asyncio.Handle | None = None
+        self._writer_registered = False
+        self._remove_writer_handle: asyncio.Handle | None = None
         self._conn_lost_count = 0
+        self._read_error_message = f"Fatal read error in {self.transport_name} transport"
+        self._write_error_message = f"Fatal write error in {self.transport_name} transport"
         self._closing = False
         self._paused = False
 
@@ -54,23 +65,62 @@ class DescriptorTransport(asyncio.transports.Transport):
 
     def _read_ready(self) -> None:
         LOGGER.debug("Event loop woke up reader")
+        self._read_ready_cb()
+
+    def _read_ready__get_buffer(self) -> None:
+        # Buffered protocols own the receive buffer, the kernel copies straight into it
+        try:
+            buffer = self._protocol.get_buffer(-1)
+            if not len(buffer):
+                raise RuntimeError("get_buffer() returned an empty buffer")
+        except (SystemExit, KeyboardInterrupt):
+            raise
+        except BaseException as exc:
+            self._fatal_error(exc, "Fatal error: protocol.get_buffer() call failed.")
+            return
+
+        try:
+            n = os.readv(self._fileno, [buffer])
+        except (BlockingIOError, InterruptedError):
+            return
+        except OSError as exc:
+            self._fatal_error(exc, self._read_error_message)
+            return
+
+        if not n:
+            self._read_ready__on_eof()
+            return
+
+        LOGGER.debug("Received %d bytes", n)
+
+        try:
+            self._protocol.buffer_updated(n)
+        except (SystemExit, KeyboardInterrupt):
+            raise
+        except BaseException as exc:
+            self._fatal_error(exc, "Fatal error: protocol.buffer_updated() call failed.")
+
+    def _read_ready__data_received(self) -> None:
         try:
             data = os.read(self._fileno, self.max_size)
         except (BlockingIOError, InterruptedError):
             pass
         except OSError as exc:
-            self._fatal_error(exc, f"Fatal read error in {self.transport_name} transport")
+            self._fatal_error(exc, self._read_error_message)
         else:
             if data:
                 LOGGER.debug("Received %r", data)
-                self._protocol.data_received(data)
+                self._data_received(data)
             else:
-                if self._loop.get_debug():
-                    LOGGER.info("%r was closed by peer", self)
-                self._closing = True
-                self._loop.remove_reader(self._fileno)
-                self._loop.call_soon(self._protocol.eof_received)
-                self._loop.call_soon(self._call_connection_lost, None)
+                self._read_ready__on_eof()
+
+    def _read_ready__on_eof(self) -> None:
+        if self._loop.get_debug():
+            LOGGER.info("%r was closed by peer", self)
+        self._closing = True
+        self._loop.remove_reader(self._fileno)
+        self._loop.call_soon(self._protocol.eof_received)
+        self._loop.call_soon(self._call_connection_lost, None)
 
     def pause_reading(self) -> None:
         if self._closing or self._paused:
@@ -145,14 +195,14 @@ class DescriptorTransport(asyncio.transports.Transport):
         self._maybe_pause_protocol()
 
     def get_write_buffer_size(self) -> int:
-        return len(self._buffer)
+        return self._buffer_size
 
     def write(self, data) -> None:
-        assert isinstance(data, (bytes, bytearray, memoryview)), repr(data)
-        LOGGER.debug("Immediately writing %r", data)
+        LOGGER.debug("Buffering %r", data)
 
-        if isinstance(data, bytearray):
-            data = memoryview(data)
+        # A single view is created here and is the only wrapper used below. It also rejects
+        # anything that isn't a bytes-like object with a `TypeError`.
+        data = memoryview(data)
         if not data:
             return
 
@@ -163,56 +213,111 @@ class DescriptorTransport(asyncio.transports.Transport):
             return
 
         if not self._buffer:
-            # Attempt to send it right away first.
-            try:
-                n = os.write(self._fileno, data)
-            except (BlockingIOError, InterruptedError):
-                n = 0
-            except (SystemExit, KeyboardInterrupt):
-                raise
-            except BaseException as exc:
-                self._conn_lost_count += 1
-                self._fatal_error(exc, f"Fatal write error in {self.transport_name} transport")
-                return
+            if self._writer_registered:
+                # The writer from the previous drain is still registered and will send this
+                self._cancel_writer_removal()
+            else:
+                # Writes made during the same event loop iteration are coalesced and
+                # sent with a single syscall once the current callbacks finish running
+                self._flush_handle = self._loop.call_soon(self._flush_write_buffer)
+
+        # Views of immutable data are queued as is. Everything else is copied, the caller
+        # is free to reuse mutable buffers once we return.
+        if isinstance(data.obj, bytes) and data.c_contiguous:
+            data = data.cast("B")
+        else:
+            data = memoryview(data.tobytes())
 
-            LOGGER.debug("Sent %d of %d bytes", n, len(data))
-            if n == len(data):
-                return
-            elif n > 0:
-                data = memoryview(data)[n:]
+        self._buffer.append(data)
+        self._buffer_size += len(data)
+        self._maybe_pause_protocol()
+
+    def writelines(self, list_of_data) -> None:
+        # The chunks are sent in order by the same flush, there's no need to join them
+        for data in list_of_data:
+            self.write(data)
+
+    def _flush_write_buffer(self) -> None:
+        self._flush_handle = None
+        self._write_ready()
+
+        # `_write_ready` can schedule another flush if the protocol resumes writing
+        if self._buffer and self._flush_handle is None:
+            self._add_writer()
+
+    def _add_writer(self) -> None:
+        self._cancel_writer_removal()
+
+        if not self._writer_registered:
             self._loop.add_writer(self._fileno, self._write_ready)
+            self._writer_registered = True
 
-        LOGGER.debug("Buffering %r", data)
-        self._buffer += data
-        self._maybe_pause_protocol()
+    def _remove_writer(self) -> None:
+        self._cancel_writer_removal()
+
+        if self._writer_registered:
+            self._loop.remove_writer(self._fileno)
+            self._writer_registered = False
+
+    def _cancel_writer_removal(self) -> None:
+        if self._remove_writer_handle is not None:
+            self._remove_writer_handle.cancel()
+            self._remove_writer_handle = None
 
     def _write_ready(self) -> None:
-        assert self._buffer, "Data should not be empty"
+        # The writer outlives a drain by one loop iteration, there may be nothing to send
+        if not self._buffer:
+            return
 
         try:
-            n = os.write(self._fileno, self._buffer)
+            if len(self._buffer) <= IOV_MAX:
+                n = os.writev(self._fileno, self._buffer)
+            else:
+                n = os.writev(self._fileno, list(itertools.islice(self._buffer, IOV_MAX)))
         except (BlockingIOError, InterruptedError):
             pass
         except (SystemExit, KeyboardInterrupt):
             raise
         except BaseException as exc:
             self._buffer.clear()
+            self._buffer_size = 0
             self._conn_lost_count += 1
-            # Remove writer here, _fatal_error() doesn't it
-            # because _buffer is empty.
-            self._loop.remove_writer(self._fileno)
-            self._fatal_error(exc, f"Fatal write error in {self.transport_name} transport")
+            # `_fatal_error()` removes the writer when it closes the transport
+            self._fatal_error(exc, self._write_error_message)
         else:
-            if n == len(self._buffer):
+            LOGGER.debug("Sent %d of %d bytes", n, self._buffer_size)
+            if n == self._buffer_size:
                 self._buffer.clear()
-                self._loop.remove_writer(self._fileno)
+                self._buffer_size = 0
+
+                # Unregistering the writer and registering it again for the next write
+                # costs two syscalls. Keep it for one more loop iteration so back-to-back
+                # writes can reuse it, `write()` cancels the removal.
+                if self._writer_registered and self._remove_writer_handle is None:
+                    self._remove_writer_handle = self._loop.call_soon(self._remove_writer)
+
                 self._maybe_resume_protocol()  # May append to buffer.
                 if self._closing:
+                    self._remove_writer()
                     self._loop.remove_reader(self._fileno)
                     self._call_connection_lost(None)
                 return
             elif n > 0:
-                del self._buffer[:n]
+                self._consume_buffer(n)
+
+    def _consume_buffer(self, n: int) -> None:
+        self._buffer_size -= n
+
+        # Drop every fully written chunk and only slice the one that was partially sent
+        while n > 0:
+            chunk = self._buffer[0]
+
+            if len(chunk) <= n:
+                n -= len(chunk)
+                self._buffer.popleft()
+            else:
+                self._buffer[0] = chunk[n:]
+                n = 0
 
     def can_write_eof(self) -> bool:
         return True
@@ -228,6 +333,14 @@ class DescriptorTransport(asyncio.transports.Transport):
     def set_protocol(self, protocol: asyncio.Protocol) -> None:
         self._protocol = protocol
 
+        # Bound once here instead of being looked up on every read
+        if isinstance(protocol, asyncio.BufferedProtocol):
+            self._data_received = None
+            self._read_ready_cb = self._read_ready__get_buffer
+        else:
+            self._data_received = protocol.data_received
+            self._read_ready_cb = self._read_ready__data_received
+
     def get_protocol(self) -> asyncio.Protocol:
         return self._protocol
 
@@ -241,17 +354,25 @@ class DescriptorTransport(asyncio.transports.Transport):
 
     def _cleanup(self):
         LOGGER.debug("Closing file descriptor %s", self._fileno)
+        self._remove_writer()
         self._loop.remove_reader(self._fileno)
         os.close(self._fileno)
         LOGGER.debug("Closing file descriptor %s: DONE", self._fileno)
         self._fileno = None
 
-    def __del__(self) -> None:
+    def __del__(self, _warn=warnings.warn) -> None:
         if getattr(self, "_fileno", None) is not None:
-            warnings.warn(f"unclosed transport {self!r}", ResourceWarning, source=self)
-            self._cleanup()
+            _warn(f"unclosed transport {self!r}", ResourceWarning, source=self)
+
+            # The event loop holds references to registered callbacks. If we are being
+            # collected, nothing is registered and only the descriptor needs to be closed.
+            os.close(self._fileno)
+            self._fileno = None
+
+    def _fatal_error(self, exc: Exception | None, message: str | None = None) -> None:
+        if message is None:
+            message = f"Fatal error in {self.transport_name} transport"
 
-    def _fatal_error(self, exc: Exception | None, message: str = f"Fatal error in {transport_name} transport") -> None:
         # should be called by exception handler only
         if isinstance(exc, OSError) and exc.errno in (errno.EIO, errno.ENXIO):
             if self._loop.get_debug():
@@ -272,9 +393,12 @@ class DescriptorTransport(asyncio.transports.Transport):
 
     def _close(self, exc: Exception | None = None) -> None:
         self._closing = True
-        if self._buffer:
-            self._loop.remove_writer(self._fileno)
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        self._remove_writer()
         self._buffer.clear()
+        self._buffer_size = 0
         self._loop.remove_reader(self._fileno)
         self._loop.call_soon(self._call_connection_lost, exc)
 
@@ -285,4 +409,5 @@ class DescriptorTransport(asyncio.transports.Transport):
         finally:
             self._cleanup()
             self._protocol = None
+            self._data_received = None
             self._loop = None
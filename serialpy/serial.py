@@ -2,8 +2,10 @@ from __future__ import annotations
 
 import os
 import io
+import sys
 import array
 import fcntl
+import struct
 import typing
 import logging
 import termios
@@ -17,8 +19,18 @@ STOPBITS_ONE = 1
 STOPBITS_TWO = 2
 
 ASYNC_LOW_LATENCY = (1 << 13)
+IOSSDATALAT = 0x80085400  # macOS `_IOW('T', 0, unsigned long)`, receive latency in microseconds
 CMSPAR = 0o10000000000
 
+# The modem bit ioctls take a pointer to a native `int`
+MODEM_BITS_STRUCT = struct.Struct("I")
+
+# `IOSSDATALAT` takes a pointer to an `unsigned long`
+DATA_LATENCY_STRUCT = struct.Struct("L")
+
+# Number of `int`s in the `TIOCGSERIAL` buffer, `struct serial_struct` is smaller than this
+SERIAL_STRUCT_INTS = 19 * 8
+
 if hasattr(termios, "CRTSCTS"):
     CRTSCTS = termios.CRTSCTS
 elif hasattr(termios, "CNEW_RTSCTS"):
@@ -26,7 +38,103 @@ elif hasattr(termios, "CNEW_RTSCTS"):
 else:
     raise RuntimeError("termios.CRTSCTS missing")
 
-
+# All baudrates supported by the platform, e.g. `{9600: termios.B9600, ...}`
+BAUDRATES = {
+    int(name[1:]): getattr(termios, name)
+    for name in dir(termios)
+    if name.startswith("B") and name[1:].isdigit()
+}
+
+# Disable interpretation of special characters
+IFLAG_CLEAR = (
+    termios.IGNBRK
+    | termios.BRKINT
+    | termios.PARMRK
+    | termios.INPCK
+    | termios.ISTRIP
+    | termios.INLCR
+    | termios.IGNCR
+    | termios.ICRNL
+)
+
+# Disable output character processing and mapping
+OFLAG_CLEAR = termios.OPOST | termios.ONLCR | termios.OCRNL
+
+# No parity bit, clear the character size
+CFLAG_CLEAR = termios.PARENB | termios.PARODD | CMSPAR | termios.CSIZE
+
+# Allow reads, disable modem-specific signal lines, 8 bits per byte
+CFLAG_SET = termios.CREAD | termios.CLOCAL | termios.CS8
+
+# `(flags to set, flags to clear)` for every supported value of each port setting
+XONXOFF_IFLAGS = {
+    True: (termios.IXON | termios.IXOFF | termios.IXANY, 0),
+    False: (0, termios.IXON | termios.IXOFF | termios.IXANY),
+}
+
+STOPBITS_CFLAGS = {
+    STOPBITS_ONE: (0, termios.CSTOPB),
+    STOPBITS_TWO: (termios.CSTOPB, 0),
+}
+
+RTSCTS_CFLAGS = {
+    True: (CRTSCTS, 0),
+    False: (0, CRTSCTS),
+}
+
+# Disable canonical mode, echo, signals, and implementation-defined input processing
+LFLAG_CLEAR = (
+    termios.ICANON
+    | termios.ECHO
+    | termios.ECHOE
+    | termios.ECHONL
+    | termios.ISIG
+    | termios.IEXTEN
+)
+
+
+def _unroll_modem_bits(cls: type[ModemBits]) -> type[ModemBits]:
+    """
+    Generates the `_mapping`-driven methods of `ModemBits` as straight-line code. The bits
+    are constant, there is no need to walk the mapping on every call.
+    """
+
+    fields = cls._mapping.items()
+
+    from_int_args = ", ".join(f"{name}=bool(n & {bit:#x})" for name, bit in fields)
+    all_set_expr = " and ".join(f"self.{name} is not None" for name, _ in fields)
+    mask_expr = " | ".join(f"({bit:#x} if self.{name} == mask else 0)" for name, bit in fields)
+    int_expr = " | ".join(f"({bit:#x} if self.{name} else 0)" for name, bit in fields)
+
+    source = (
+        f"def from_int(cls, n):\n"
+        f"    return cls({from_int_args})\n"
+        f"def all_bits_set(self):\n"
+        f"    return {all_set_expr}\n"
+        f"def mask_of_value(self, mask):\n"
+        f"    return {mask_expr}\n"
+        f"def as_int(self):\n"
+        f"    if not self.all_bits_set:\n"
+        f"        raise ValueError(f'Cannot convert to int when bit is not set: {{self!r}}')\n"
+        f"    return {int_expr}\n"
+    )
+
+    namespace: dict[str, typing.Any] = {}
+    exec(source, {"__name__": cls.__module__}, namespace)
+
+    for name, func in namespace.items():
+        func.__module__ = cls.__module__
+        func.__qualname__ = f"{cls.__qualname__}.{name}"
+
+    cls.from_int = classmethod(namespace["from_int"])  # type: ignore[method-assign]
+    cls.all_bits_set = property(namespace["all_bits_set"])  # type: ignore[method-assign]
+    cls.mask_of_value = namespace["mask_of_value"]  # type: ignore[method-assign]
+    cls.as_int = namespace["as_int"]  # type: ignore[method-assign]
+
+    return cls
+
+
+@_unroll_modem_bits
 @dataclasses.dataclass(frozen=True)
 class ModemBits:
     le: bool | None = None
@@ -55,35 +163,17 @@ class ModemBits:
     def all_off(cls) -> ModemBits:
         return cls.from_int(0x00000000)
 
-    @classmethod
-    def from_int(cls, n: int) -> ModemBits:
-        return cls(**{name: bool(n & bit) for name, bit in cls._mapping.items()})
-
-    @property
-    def all_bits_set(self) -> bool:
-        return all(getattr(self, name) is not None for name in self._mapping.keys())
-
-    def mask_of_value(self, mask: typing.Literal[True, False, None]) -> int:
-        result = 0x00000000
-
-        for name, bit in self._mapping.items():
-            value = getattr(self, name)
-
-            if value == mask:
-                result |= bit
-
-        return result
-
-    def as_int(self) -> int:
-        if not self.all_bits_set:
-            raise ValueError(f"Cannot convert to int when bit is not set: {self!r}")
+    if typing.TYPE_CHECKING:
+        # Generated by `_unroll_modem_bits`
+        @classmethod
+        def from_int(cls, n: int) -> ModemBits: ...
 
-        result = 0x00000000
+        @property
+        def all_bits_set(self) -> bool: ...
 
-        for name, bit in self._mapping.items():
-            result |= bit if getattr(self, name) else 0x00000000
+        def mask_of_value(self, mask: typing.Literal[True, False, None]) -> int: ...
 
-        return result
+        def as_int(self) -> int: ...
 
 
 class Serial(io.RawIOBase):
@@ -96,6 +186,7 @@ class Serial(io.RawIOBase):
         rtscts=False,
         *,
         fileno=None,
+        latency_timer_us=None,
     ):
         super().__init__()
         self._path = path
@@ -103,6 +194,7 @@ class Serial(io.RawIOBase):
         self._stopbits = stopbits
         self._xonxoff = xonxoff
         self._rtscts = rtscts
+        self._latency_timer_us = latency_timer_us
 
         if fileno is not None:
             self._fileno = fileno
@@ -111,6 +203,9 @@ class Serial(io.RawIOBase):
             self._fileno = os.open(self._path, os.O_RDWR | os.O_NOCTTY)
             self._should_cleanup = True
 
+        # Reused by `set_low_latency`, `TIOCGSERIAL` overwrites it on every call
+        self._serial_struct = array.array("i", [0x00000000]) * SERIAL_STRUCT_INTS
+
         self.configure_port()
 
     def configure_port(self) -> None:
@@ -119,71 +214,29 @@ class Serial(io.RawIOBase):
 
         iflag, oflag, cflag, lflag, ispeed, ospeed, cc = termios.tcgetattr(self._fileno)
 
-        # Software flow control
-        if self._xonxoff:
-            iflag |= termios.IXON | termios.IXOFF | termios.IXANY
-        else:
-            iflag &= ~(termios.IXON | termios.IXOFF | termios.IXANY)
-
-        # Disable interpretation of special characters
-        iflag &= ~(
-            termios.IGNBRK
-            | termios.BRKINT
-            | termios.PARMRK
-            | termios.INPCK
-            | termios.ISTRIP
-            | termios.INLCR
-            | termios.IGNCR
-            | termios.ICRNL
-            | termios.IXON
-        )
-
-        # Disable output character processing and mapping
-        oflag &= ~(termios.OPOST | termios.ONLCR | termios.OCRNL)
-
-        # Allow reads
-        cflag |= termios.CREAD
-
-        # Disable modem-specific signal lines
-        cflag |= termios.CLOCAL
-
-        # No parity bit
-        cflag &= ~(termios.PARENB | termios.PARODD | CMSPAR)
-
-        # Stop bits
-        if self._stopbits == STOPBITS_ONE:
-            cflag &= ~termios.CSTOPB
-        else:
-            cflag |= termios.CSTOPB
-
-        # 8 bits per byte
-        cflag &= ~termios.CSIZE
-        cflag |= termios.CS8
-
-        # Hardware flow control
-        if self._rtscts:
-            cflag |= CRTSCTS
-        else:
-            cflag &= ~CRTSCTS
-
-        # Disable canonical mode (newlines)
-        lflag &= ~termios.ICANON
-
-        # Disable echo
-        lflag &= ~(termios.ECHO | termios.ECHOE | termios.ECHONL)
+        try:
+            stopbits_set, stopbits_clear = STOPBITS_CFLAGS[self._stopbits]
+        except KeyError:
+            raise ValueError(f"Unsupported stopbits: {self._stopbits!r}") from None
 
-        # Disable interpretation of special characters
-        lflag &= ~termios.ISIG
+        # Software and hardware flow control
+        xonxoff_set, xonxoff_clear = XONXOFF_IFLAGS[bool(self._xonxoff)]
+        rtscts_set, rtscts_clear = RTSCTS_CFLAGS[bool(self._rtscts)]
 
-        # Disable implementation-defined input processing
-        lflag &= ~termios.IEXTEN
+        iflag = (iflag & ~(IFLAG_CLEAR | xonxoff_clear)) | xonxoff_set
+        oflag &= ~OFLAG_CLEAR
+        cflag = (cflag & ~(CFLAG_CLEAR | stopbits_clear | rtscts_clear)) | CFLAG_SET | stopbits_set | rtscts_set
+        lflag &= ~LFLAG_CLEAR
 
         # Set baudrate
-        ispeed = getattr(termios, f"B{self._baudrate}")
-        ospeed = getattr(termios, f"B{self._baudrate}")
-
-        # Non-blocking reads
-        cc[termios.VMIN] = 0
+        try:
+            ispeed = ospeed = BAUDRATES[self._baudrate]
+        except KeyError:
+            raise ValueError(f"Unsupported baudrate: {self._baudrate!r}") from None
+
+        # Blocking reads return as soon as one byte arrives, along with everything else that
+        # is already buffered. This has no effect on descriptors opened with `O_NONBLOCK`.
+        cc[termios.VMIN] = 1
         cc[termios.VTIME] = 0
 
         termios.tcsetattr(
@@ -192,7 +245,12 @@ class Serial(io.RawIOBase):
             [iflag, oflag, cflag, lflag, ispeed, ospeed, cc],
         )
 
-        self.set_low_latency(True)
+        # Both write `IOSSDATALAT` on macOS, an explicit latency timer replaces the default
+        if sys.platform != "darwin" or self._latency_timer_us is None:
+            self.set_low_latency(True)
+
+        if self._latency_timer_us is not None:
+            self.set_latency_timer(self._latency_timer_us)
 
     @property
     def name(self) -> str:
@@ -208,17 +266,24 @@ class Serial(io.RawIOBase):
 
     def get_modem_bits(self) -> ModemBits:
         # A `bytearray` is critical here: `bytes` will not be mutated
-        buffer = bytearray((0x00000000).to_bytes(4, "little"))
+        buffer = bytearray(MODEM_BITS_STRUCT.size)
         fcntl.ioctl(self._fileno, termios.TIOCMGET, buffer)
 
-        return ModemBits.from_int(int.from_bytes(buffer, "little"))
+        (value,) = MODEM_BITS_STRUCT.unpack_from(buffer)
+        return ModemBits.from_int(value)
 
     def set_low_latency(self, low_latency: bool) -> None:
+        if sys.platform == "darwin":
+            # USB serial drivers buffer received data (16ms for FTDI) unless told otherwise,
+            # a latency of zero restores the driver default
+            self._set_data_latency(1 if low_latency else 0)
+            return
+
         if not hasattr(termios, "TIOCGSERIAL"):
             LOGGER.warning("Platform does not support low latency mode")
             return
 
-        buffer = array.array("i", [0x00000000] * 19 * 8)
+        buffer = self._serial_struct
         fcntl.ioctl(self._fileno, termios.TIOCGSERIAL, buffer)
 
         LOGGER.debug("Read low latency %r", buffer)
@@ -232,6 +297,37 @@ class Serial(io.RawIOBase):
 
         fcntl.ioctl(self._fileno, termios.TIOCSSERIAL, buffer)
 
+    def _set_data_latency(self, latency_us: int) -> None:
+        LOGGER.debug("Setting data latency to %dus", latency_us)
+
+        try:
+            fcntl.ioctl(self._fileno, IOSSDATALAT, DATA_LATENCY_STRUCT.pack(latency_us))
+        except OSError as exc:
+            LOGGER.warning("Device does not support setting the data latency: %r", exc)
+
+    def set_latency_timer(self, latency_us: int) -> None:
+        # Zero would mean "driver default" on macOS but the 1ms minimum on Linux
+        if latency_us < 1:
+            raise ValueError(f"Latency timer must be at least 1us: {latency_us!r}")
+
+        if sys.platform == "darwin":
+            self._set_data_latency(latency_us)
+            return
+
+        # USB serial adapters expose their latency timer in milliseconds through sysfs
+        latency_ms = max(1, latency_us // 1000)
+
+        try:
+            name = os.path.basename(os.ttyname(self._fileno))
+            latency_path = f"/sys/class/tty/{name}/device/latency_timer"
+
+            LOGGER.debug("Setting latency timer to %dms via %s", latency_ms, latency_path)
+
+            with open(latency_path, "w") as f:
+                f.write(f"{latency_ms}\n")
+        except OSError as exc:
+            LOGGER.warning("Device does not support setting the latency timer: %r", exc)
+
     def set_modem_bits(self, modem_bits: ModemBits | None = None, **kwargs) -> None:
         if modem_bits is None:
             modem_bits = ModemBits(**kwargs)
@@ -241,18 +337,18 @@ class Serial(io.RawIOBase):
         if modem_bits.all_bits_set:
             value = modem_bits.as_int()
             LOGGER.debug("Setting all modem bits: 0x%08X", value)
-            fcntl.ioctl(self._fileno, termios.TIOCMSET, value.to_bytes(4, "little"))
+            fcntl.ioctl(self._fileno, termios.TIOCMSET, MODEM_BITS_STRUCT.pack(value))
         else:
             to_set = modem_bits.mask_of_value(True)
             to_clear = modem_bits.mask_of_value(False)
 
             if to_set:
                 LOGGER.debug("Setting modem bits: 0x%08X", to_set)
-                fcntl.ioctl(self._fileno, termios.TIOCMBIS, to_set.to_bytes(4, "little"))
+                fcntl.ioctl(self._fileno, termios.TIOCMBIS, MODEM_BITS_STRUCT.pack(to_set))
 
             if to_clear:
                 LOGGER.debug("Clearing modem bits: 0x%08X", to_clear)
-                fcntl.ioctl(self._fileno, termios.TIOCMBIC, to_clear.to_bytes(4, "little"))
+                fcntl.ioctl(self._fileno, termios.TIOCMBIC, MODEM_BITS_STRUCT.pack(to_clear))
 
     @property
     def dtr(self) -> bool:
@@ -280,24 +376,35 @@ class Serial(io.RawIOBase):
 
     def readinto(self, b: bytearray) -> int:
         # `io.IOBase` implements `read`, `readline`, using `readinto`
-        chunk = os.read(self._fileno, len(b))
-        n = len(chunk)
-        b[:n] = chunk
+        return os.readv(self._fileno, [b])
 
-        return n
-
-    def readexactly(self, n: int) -> bytes:
-        buffer = bytearray(n)
-        view = memoryview(buffer)
+    def readinto_exactly(self, b: bytearray) -> None:
+        # Fills the entire buffer, the caller can reuse it across reads
+        view = memoryview(b).cast("B")
+        n = len(view)
         remaining = n
 
         while remaining > 0:
-            remaining -= self.readinto(view)
+            count = self.readinto(view[n - remaining:])
+
+            # Blocking reads only return nothing at EOF, e.g. once the device is unplugged
+            if count == 0:
+                raise EOFError(f"Port closed after reading {n - remaining} of {n} bytes")
+
+            remaining -= count
+
+    def readexactly(self, n: int) -> bytes:
+        buffer = bytearray(n)
+        self.readinto_exactly(buffer)
 
         return bytes(buffer)
 
-    def write(self, data: bytes):
-        os.write(self._fileno, data)
+    def write(self, data: bytes) -> int:
+        return os.write(self._fileno, data)
+
+    def writev(self, buffers: typing.Sequence[bytes]) -> int:
+        # Gathers all of the buffers in a single syscall, without joining them first
+        return os.writev(self._fileno, buffers)
 
     def __enter__(self) -> Serial:
         return self
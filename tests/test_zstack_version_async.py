@@ -1,20 +1,76 @@
+import os
 import asyncio
-import contextlib
 
 import serialpy
 
+try:
+    import uvloop
+except ImportError:
+    uvloop = None
 
+
+PORT = os.environ.get("SERIALPY_TEST_PORT", "/dev/cu.usbserial-1420")
+BAUDRATE = int(os.environ.get("SERIALPY_TEST_BAUDRATE", "115200"))
+# Number of extra back-to-back exchanges to run when benchmarking, e.g. under `time`
+ITERATIONS = int(os.environ.get("SERIALPY_TEST_ITERATIONS", "0"))
+
+VERSION_REQ = b"\xFE\x00\x21\x02\x23"
 EXPECTED_RSP = b'\xFE\x0A\x61\x02\x02\x01\x02\x07\x01\x36\x8B\x34\x01\x00\xE6'
+EXPECTED_LEN = len(EXPECTED_RSP)
+
+
+async def batch_exchange(reader, writer, exchanges):
+    """
+    Sends all `(request, response_length)` requests at once and then reads the responses
+    in order. The requests are queued within one event loop iteration, the transport sends
+    them with a single `writev`.
+    """
+
+    writer.writelines([request for request, _ in exchanges])
+    await writer.drain()
+
+    return [await reader.readexactly(length) for _, length in exchanges]
+
+
+async def bench(reader, writer, iterations):
+    # Methods are bound once, outside of the loop
+    write = writer.write
+    drain = writer.drain
+    readexactly = reader.readexactly
+
+    for _ in range(iterations):
+        write(VERSION_REQ)
+        await drain()
+        rsp = await readexactly(EXPECTED_LEN)
+        assert rsp == EXPECTED_RSP, repr(rsp)
+
 
 async def main():
-    reader, writer = await serialpy.open_serial_connection("/dev/cu.usbserial-1420", baudrate=115200)
+    async with serialpy.serial_connection(PORT, baudrate=BAUDRATE, latency_timer_us=1) as (reader, writer):
+        # Start waiting for the response before the request is flushed and drained
+        read_task = asyncio.create_task(reader.readexactly(EXPECTED_LEN))
+
+        try:
+            # SOF and the frame are sent together with one `writev`
+            writer.writelines([VERSION_REQ[:1], VERSION_REQ[1:]])
+            await writer.drain()
+            rsp = await read_task
+        finally:
+            read_task.cancel()
 
-    with contextlib.closing(writer):
-        writer.write(b"\xFE\x00\x21\x02\x23")
-        await writer.drain()
-        rsp = await reader.readexactly(len(EXPECTED_RSP))
         assert rsp == EXPECTED_RSP, repr(rsp)
 
+        # Pipelined commands only pay for one round trip
+        rsps = await batch_exchange(reader, writer, [(VERSION_REQ, EXPECTED_LEN)] * 3)
+        assert rsps == [EXPECTED_RSP] * 3, repr(rsps)
+
+        if ITERATIONS:
+            await bench(reader, writer, ITERATIONS)
+
 
 if __name__ == "__main__":
+    # The transport only needs `add_reader`/`add_writer`, which uvloop implements
+    if uvloop is not None:
+        asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+
     asyncio.run(main())
@@ -1,17 +1,56 @@
+import os
+import termios
+import unittest.mock
+
 import serialpy
 
+
+PORT = os.environ.get("SERIALPY_TEST_PORT", "/dev/cu.usbserial-1420")
+BAUDRATE = int(os.environ.get("SERIALPY_TEST_BAUDRATE", "115200"))
+# Number of extra back-to-back exchanges to run when benchmarking, e.g. under `time`
+ITERATIONS = int(os.environ.get("SERIALPY_TEST_ITERATIONS", "0"))
+
+VERSION_REQ = b"\xFE\x00\x21\x02\x23"
+EXPECTED_RSP = b'\xFE\x0A\x61\x02\x02\x01\x02\x07\x01\x36\x8B\x34\x01\x00\xE6'
+EXPECTED_LEN = len(EXPECTED_RSP)
+
+
+def bench(serial, iterations):
+    # Methods are bound once, outside of the loop
+    write = serial.write
+    readinto_exactly = serial.readinto_exactly
+    rsp = bytearray(EXPECTED_LEN)
+
+    for _ in range(iterations):
+        write(VERSION_REQ)
+        readinto_exactly(rsp)
+        assert rsp == EXPECTED_RSP, repr(rsp)
+
+
 if __name__ == "__main__":
-    EXPECTED_RSP = b'\xFE\x0A\x61\x02\x02\x01\x02\x07\x01\x36\x8B\x34\x01\x00\xE6'
+    with serialpy.Serial(PORT, baudrate=BAUDRATE, latency_timer_us=1) as serial:
+        # Blocking reads must return as soon as a single byte is available
+        cc = termios.tcgetattr(serial.fileno())[6]
+        assert (cc[termios.VMIN], cc[termios.VTIME]) == (1, 0), cc
 
-    with serialpy.Serial("/dev/cu.usbserial-1420", baudrate=115200) as serial:
         serial.set_modem_bits(serialpy.ModemBits.all_off())
 
         assert serial.get_modem_bits() == serialpy.ModemBits.from_int(0)
 
-        serial.write(b"\xFE\x00\x21\x02\x23")
-        rsp = serial.readexactly(len(EXPECTED_RSP))
+        # The request must not be fragmented into multiple `write(2)` syscalls
+        with unittest.mock.patch("os.write", wraps=os.write) as os_write:
+            assert serial.write(VERSION_REQ) == len(VERSION_REQ)
+
+        assert os_write.call_count == 1, os_write.call_args_list
+
+        # Read into a preallocated buffer, there's no intermediate `bytes` object
+        rsp = bytearray(EXPECTED_LEN)
+        serial.readinto_exactly(rsp)
         assert rsp == EXPECTED_RSP, repr(rsp)
 
+        if ITERATIONS:
+            bench(serial, ITERATIONS)
+
         serial.set_modem_bits(serialpy.ModemBits(rts=True))
         assert serial.get_modem_bits().rts is True
         serial.set_modem_bits(serialpy.ModemBits(rts=False))